@@ -51,10 +51,6 @@ def main():
         torch.save(policies[player_id].collect_mode.state_dict(), player_ckpt_path)
         league.judge_snapshot(player_id, force=True)
 
-    model = VAC(**cfg.policy.model)
-    policy = PPOPolicy(cfg.policy, model=model)
-    policies['historical'] = policy
-
     with Task(async_mode=True, n_async_workers=3, auto_sync_ctx=False) as task:
         if not task.router.is_active:
             logging.info("League should be executed in parallel mode, use `main_league.sh` to execute league!")
@@ -1,5 +1,6 @@
 import torch
-import time
+from itertools import cycle
+from threading import Event
 from typing import TYPE_CHECKING
 
 from ding.league import player
@@ -21,23 +22,26 @@ def league_dispatcher(task: "Task", cfg: dict, tb_logger: "DistributedWriter", l
     online_learners = {}
     for player_id in league.active_players_ids:
         online_learners[player_id] = False
+    all_learners_online = Event()
 
     def learner_online(player_id):
         print("Get learner", player_id)
         online_learners[player_id] = True
+        if all(online_learners.values()):
+            all_learners_online.set()
 
     task.on("learner_online", learner_online)
 
+    # Round-robin over active players, one player per round
+    player_iter = cycle(zip(league.active_players_ids, league.active_players_ckpts))
+
     def _league(ctx: "Context"):
         print("Waiting for all learners online")
-        while True:
-            if all(online_learners.values()):
-                break
-            time.sleep(0.1)
+        if not all(online_learners.values()):
+            all_learners_online.wait()
         print("League dispatching on node {}".format(task.router.node_id))
         # One episode each round
-        i = ctx.total_step % len(league.active_players_ids)
-        player_id, player_ckpt_path = league.active_players_ids[i], league.active_players_ckpts[i]
+        player_id, player_ckpt_path = next(player_iter)
 
         job = league.get_job_info(player_id)
         opponent_player_id = job['player_id'][1]
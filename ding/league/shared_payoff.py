@@ -208,16 +208,18 @@ class BattleSharedPayoff:
                 self._data[key]['games'] += 1
             else:
                 key, reverse = self.get_key(home_id, away_id)
+                handle = self._data[key]
                 # Update with decay
                 # job_info_result is a two-layer list, including total NxM episodes of M envs,
                 # the first(outer) layer is episode dimension and the second(inner) layer is env dimension.
                 for one_episode_result in job_info_result:
                     for one_episode_result_per_env in one_episode_result:
-                        # All categories should decay
-                        self._data[key] *= self._decay
-                        self._data[key]['games'] += 1
+                        # All categories should decay, in place to avoid copying the record for each episode
+                        for k in BattleRecordDict.data_keys:
+                            handle[k] *= self._decay
+                        handle['games'] += 1
                         result = _win_loss_reverse(one_episode_result_per_env, reverse)
-                        self._data[key][result] += 1
+                        handle[result] += 1
             return True
 
     def get_key(self, home: str, away: str) -> Tuple[str, bool]:
@@ -128,6 +128,10 @@ class TestBattleSharedPayoff:
         assert len(win_rate.shape) == 1
         assert win_rate[0] == pytest.approx(0.5)  # no enough game results, return 0.5 by default
 
+        # test empty away list (e.g. no historical players yet)
+        win_rate = setup_battle_shared_payoff[home, []]
+        assert win_rate.shape == (0, )
+
         # test players list
         for i in range(314):
             home = np.random.choice(setup_battle_shared_payoff.players)
@@ -7,6 +7,21 @@ from ..common import ReparameterizationHead, RegressionHead, DiscreteHead, Multi
     FCEncoder, ConvEncoder
 
 
+def _get_encoder_cls(obs_shape: Union[int, SequenceType]) -> type:
+    r"""
+    Overview:
+        Choose the pre-defined encoder class according to the (squeezed) observation shape.
+    """
+    if isinstance(obs_shape, int) or len(obs_shape) == 1:
+        return FCEncoder
+    elif len(obs_shape) == 3:
+        return ConvEncoder
+    else:
+        raise RuntimeError(
+            "not support obs_shape for pre-defined encoder: {}, please customize your own MAVAC".format(obs_shape)
+        )
+
+
 @MODEL_REGISTRY.register('mavac')
 class MAVAC(nn.Module):
     r"""
@@ -59,24 +74,8 @@ class MAVAC(nn.Module):
         action_shape: int = squeeze(action_shape)
         self.global_obs_shape, self.agent_obs_shape, self.action_shape = global_obs_shape, agent_obs_shape, action_shape
         # Encoder Type
-        if isinstance(agent_obs_shape, int) or len(agent_obs_shape) == 1:
-            encoder_cls = FCEncoder
-        elif len(agent_obs_shape) == 3:
-            encoder_cls = ConvEncoder
-        else:
-            raise RuntimeError(
-                "not support obs_shape for pre-defined encoder: {}, please customize your own DQN".
-                format(agent_obs_shape)
-            )
-        if isinstance(global_obs_shape, int) or len(global_obs_shape) == 1:
-            global_encoder_cls = FCEncoder
-        elif len(global_obs_shape) == 3:
-            global_encoder_cls = ConvEncoder
-        else:
-            raise RuntimeError(
-                "not support obs_shape for pre-defined encoder: {}, please customize your own DQN".
-                format(global_obs_shape)
-            )
+        encoder_cls = _get_encoder_cls(agent_obs_shape)
+        global_encoder_cls = _get_encoder_cls(global_obs_shape)
 
         self.actor_encoder = encoder_cls(
             agent_obs_shape, encoder_hidden_size_list, activation=activation, norm_type=norm_type
@@ -93,13 +92,11 @@ class MAVAC(nn.Module):
         self.actor_head = actor_head_cls(
             actor_head_hidden_size, action_shape, actor_head_layer_num, activation=activation, norm_type=norm_type
         )
-        # must use list, not nn.ModuleList
-        self.actor = [self.actor_encoder, self.actor_head]
-        self.critic = [self.critic_encoder, self.critic_head]
         # for convenience of call some apis(such as: self.critic.parameters()), but may cause
-        # misunderstanding when print(self)
-        self.actor = nn.ModuleList(self.actor)
-        self.critic = nn.ModuleList(self.critic)
+        # misunderstanding when print(self). Only used as parameter groups, forward calls the
+        # encoder and head directly.
+        self.actor = nn.ModuleList([self.actor_encoder, self.actor_head])
+        self.critic = nn.ModuleList([self.critic_encoder, self.critic_head])
 
     def forward(self, inputs: Union[torch.Tensor, Dict], mode: str) -> Dict:
         r"""
@@ -179,8 +176,7 @@ class MAVAC(nn.Module):
 
         x = self.actor_encoder(x)
         x = self.actor_head(x)
-        logit = x['logit']
-        logit[action_mask == 0.0] = -99999999
+        logit = x['logit'].masked_fill(action_mask == 0.0, -99999999)
         return {'logit': logit}
 
     def compute_critic(self, x: Dict) -> Dict:
@@ -248,5 +244,4 @@ class MAVAC(nn.Module):
         """
         logit = self.compute_actor(x)['logit']
         value = self.compute_critic(x)['value']
-        action_mask = x['action_mask']
         return {'logit': logit, 'value': value}
@@ -1,11 +1,9 @@
-from typing import Any, Tuple, Callable, Optional, List, Dict
+from typing import Any, Tuple, Callable, Optional, List, Dict, Union
 from abc import ABC
 
-import numpy as np
 import torch
 from ding.torch_utils import get_tensor_data
 from ding.rl_utils import create_noise_generator
-from torch.distributions import Categorical, Independent, Normal
 from ding.utils.data import default_collate
 import torch.nn.functional as F
 
@@ -37,11 +35,12 @@ class IModelWrapper(ABC):
         Overview:
             get info of attr_name
         """
-        if attr_name in dir(self):
+        # membership tests instead of ``dir``, which builds and sorts the whole attribute list on every call
+        if attr_name in self.__dict__ or hasattr(type(self), attr_name):
             if isinstance(self._model, IModelWrapper):
                 return '{} {}'.format(self.__class__.__name__, self._model.info(attr_name))
             else:
-                if attr_name in dir(self._model):
+                if hasattr(self._model, attr_name):
                     return '{} {}'.format(self.__class__.__name__, self._model.__class__.__name__)
                 else:
                     return '{}'.format(self.__class__.__name__)
@@ -104,11 +103,11 @@ class HiddenStateWrapper(IModelWrapper):
     def forward(self, data, **kwargs):
         state_id = kwargs.pop('data_id', None)
         valid_id = kwargs.pop('valid_id', None)  # None, not used in any code in DI-engine
-        data, state_info = self.before_forward(data, state_id)  # update data['prev_state'] with self._state
+        data, state_id = self.before_forward(data, state_id)  # update data['prev_state'] with self._state
         output = self._model.forward(data, **kwargs)
         h = output.pop('next_state', None)
         if h is not None:
-            self.after_forward(h, state_info, valid_id)  # this is to store the 'next hidden state' for each time step
+            self.after_forward(h, state_id, valid_id)  # this is to store the 'next hidden state' for each time step
         if self._save_prev_state:
             prev_state = get_tensor_data(data['prev_state'])
             output['prev_state'] = prev_state
@@ -130,22 +129,22 @@ class HiddenStateWrapper(IModelWrapper):
         for idx, s in zip(state_id, state):
             self._state[idx] = s
 
-    def before_forward(self, data: dict, state_id: Optional[list]) -> Tuple[dict, dict]:
+    def before_forward(self, data: dict, state_id: Optional[list]) -> Tuple[dict, list]:
         if state_id is None:
             state_id = [i for i in range(self._state_num)]
 
-        state_info = {idx: self._state[idx] for idx in state_id}
-        data['prev_state'] = list(state_info.values())
-        return data, state_info
+        data['prev_state'] = [self._state[idx] for idx in state_id]
+        return data, state_id
 
-    def after_forward(self, h: Any, state_info: dict, valid_id: Optional[list] = None) -> None:
-        assert len(h) == len(state_info), '{}/{}'.format(len(h), len(state_info))
-        for i, idx in enumerate(state_info.keys()):
-            if valid_id is None:
-                self._state[idx] = h[i]
-            else:
+    def after_forward(self, h: Any, state_id: list, valid_id: Optional[list] = None) -> None:
+        assert len(h) == len(state_id), '{}/{}'.format(len(h), len(state_id))
+        if valid_id is None:
+            self._state.update(zip(state_id, h))
+        else:
+            valid_id = set(valid_id)
+            for idx, s in zip(state_id, h):
                 if idx in valid_id:
-                    self._state[idx] = h[i]
+                    self._state[idx] = s
 
 
 class TransformerInputWrapper(IModelWrapper):
@@ -351,18 +350,87 @@ class TransformerMemoryWrapper(IModelWrapper):
             print()
 
 
-def sample_action(logit=None, prob=None):
+def sample_action(logit=None, prob=None, alpha=None):
     if prob is None:
-        prob = torch.softmax(logit, dim=-1)
+        # Gumbel-max trick: argmax(logit + Gumbel(0, 1) noise) is a sample of Categorical(softmax(logit)),
+        # which needs neither softmax normalization nor multinomial sampling
+        gumbel = -torch.empty_like(logit).exponential_().log()
+        if alpha is not None:
+            # argmax(logit / alpha + gumbel) == argmax(logit + alpha * gumbel) for alpha > 0,
+            # scale the noise in place rather than allocating ``logit / alpha``
+            gumbel.mul_(alpha)
+        return (logit + gumbel).argmax(dim=-1)
     shape = prob.shape
-    prob += 1e-8
-    prob = prob.view(-1, shape[-1])
+    # not in-place, prob may be the caller's tensor
+    prob = prob + 1e-8
+    # reshape only copies when prob's layout (e.g. strides kept from a permuted mask) can't be viewed as 2-D
+    prob = prob.reshape(-1, shape[-1])
     # prob can also be treated as weight in multinomial sample
     action = torch.multinomial(prob, 1).squeeze(-1)
     action = action.view(*shape[:-1])
     return action
 
 
+def sample_normal(mu: torch.Tensor, sigma: torch.Tensor) -> torch.Tensor:
+    r"""
+    Overview:
+        Sample from :math:`N(\mu, \sigma^2)` as ``mu + sigma * eps`` with standard normal ``eps``, the same \
+        as ``Independent(Normal(mu, sigma), 1).sample()`` but without building distribution objects.
+    Arguments:
+        - mu (:obj:`torch.Tensor`): Mean of the gaussian.
+        - sigma (:obj:`torch.Tensor`): Standard deviation of the gaussian.
+    Returns:
+        - action (:obj:`torch.Tensor`): Sampled action, which is detached like ``Distribution.sample``.
+    """
+    with torch.no_grad():
+        return torch.addcmul(mu, sigma, torch.randn_like(mu))
+
+
+def multi_head_argmax(logit: List[torch.Tensor]) -> List[torch.Tensor]:
+    r"""
+    Overview:
+        Argmax action of each head. When all the heads have the same shape (e.g. multi-discrete action space), \
+        stack them and call argmax only once instead of once per head.
+    Arguments:
+        - logit (:obj:`List[torch.Tensor]`): Logit of each head.
+    Returns:
+        - action (:obj:`List[torch.Tensor]`): Argmax action of each head.
+    """
+    if len(logit) > 1 and all(l.shape == logit[0].shape for l in logit[1:]):
+        return list(torch.stack(logit).argmax(dim=-1).unbind(0))
+    return [l.argmax(dim=-1) for l in logit]
+
+
+def eps_greedy_action(
+        logit: torch.Tensor,
+        eps: Union[float, torch.Tensor],
+        mask: Optional[torch.Tensor] = None,
+        exploit_action: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    r"""
+    Overview:
+        Epsilon greedy action selection, each sample in the batch decides whether to explore independently, \
+        so that the whole selection is done with a few batched tensor ops instead of python branches.
+    Arguments:
+        - logit (:obj:`torch.Tensor`): Logit tensor, the last dim is action dim.
+        - eps (:obj:`Union[float, torch.Tensor]`): Exploration probability, a float or a tensor which can be \
+            broadcast to ``logit.shape[:-1]``.
+        - mask (:obj:`Optional[torch.Tensor]`): Action mask, random actions are only sampled from valid actions.
+        - exploit_action (:obj:`Optional[torch.Tensor]`): Action used by the samples which don't explore, \
+            default to the argmax of ``logit``.
+    Returns:
+        - action (:obj:`torch.Tensor`): Selected action, shape is ``logit.shape[:-1]``.
+    """
+    if exploit_action is None:
+        exploit_action = logit.argmax(dim=-1)
+    if mask is not None:
+        random_action = sample_action(prob=mask.float())
+    else:
+        random_action = torch.randint(0, logit.shape[-1], size=logit.shape[:-1], device=logit.device)
+    explore = torch.rand(logit.shape[:-1], device=logit.device) < eps
+    return torch.where(explore, random_action, exploit_action)
+
+
 class ArgmaxSampleWrapper(IModelWrapper):
     r"""
     Overview:
@@ -380,8 +448,8 @@ class ArgmaxSampleWrapper(IModelWrapper):
             mask = output['action_mask']
             if isinstance(mask, torch.Tensor):
                 mask = [mask]
-            logit = [l.sub_(1e8 * (1 - m)) for l, m in zip(logit, mask)]
-        action = [l.argmax(dim=-1) for l in logit]
+            logit = [l.masked_fill_(m == 0, -1e8) for l, m in zip(logit, mask)]
+        action = multi_head_argmax(logit)
         if len(action) == 1:
             action, logit = action[0], logit[0]
         output['action'] = action
@@ -408,8 +476,8 @@ class HybridArgmaxSampleWrapper(IModelWrapper):
             mask = output['action_mask']
             if isinstance(mask, torch.Tensor):
                 mask = [mask]
-            logit = [l.sub_(1e8 * (1 - m)) for l, m in zip(logit, mask)]
-        action = [l.argmax(dim=-1) for l in logit]
+            logit = [l.masked_fill_(m == 0, -1e8) for l, m in zip(logit, mask)]
+        action = multi_head_argmax(logit)
         if len(action) == 1:
             action, logit = action[0], logit[0]
         output = {'action': {'action_type': action, 'action_args': output['action_args']}, 'logit': logit}
@@ -439,12 +507,9 @@ class MultinomialSampleWrapper(IModelWrapper):
             mask = output['action_mask']
             if isinstance(mask, torch.Tensor):
                 mask = [mask]
-            logit = [l.sub_(1e8 * (1 - m)) for l, m in zip(logit, mask)]
-        if alpha is None:
-            action = [sample_action(logit=l) for l in logit]
-        else:
-            # Note that if alpha is passed in here, we will divide logit by alpha.
-            action = [sample_action(logit=l / alpha) for l in logit]
+            logit = [l.masked_fill_(m == 0, -1e8) for l, m in zip(logit, mask)]
+        # Note that if alpha is passed in here, we will sample with temperature alpha, i.e. from softmax(logit / alpha).
+        action = [sample_action(logit=l, alpha=alpha) for l in logit]
         if len(action) == 1:
             action, logit = action[0], logit[0]
         output['action'] = action
@@ -471,18 +536,10 @@ class EpsGreedySampleWrapper(IModelWrapper):
             mask = output['action_mask']
             if isinstance(mask, torch.Tensor):
                 mask = [mask]
-            logit = [l.sub_(1e8 * (1 - m)) for l, m in zip(logit, mask)]
+            logit = [l.masked_fill_(m == 0, -1e8) for l, m in zip(logit, mask)]
         else:
-            mask = None
-        action = []
-        for i, l in enumerate(logit):
-            if np.random.random() > eps:
-                action.append(l.argmax(dim=-1))
-            else:
-                if mask:
-                    action.append(sample_action(prob=mask[i].float()))
-                else:
-                    action.append(torch.randint(0, l.shape[-1], size=l.shape[:-1]))
+            mask = [None] * len(logit)
+        action = [eps_greedy_action(l, eps, m) for l, m in zip(logit, mask)]
         if len(action) == 1:
             action, logit = action[0], logit[0]
         output['action'] = action
@@ -514,22 +571,13 @@ class EpsGreedyMultinomialSampleWrapper(IModelWrapper):
             mask = output['action_mask']
             if isinstance(mask, torch.Tensor):
                 mask = [mask]
-            logit = [l.sub_(1e8 * (1 - m)) for l, m in zip(logit, mask)]
+            logit = [l.masked_fill_(m == 0, -1e8) for l, m in zip(logit, mask)]
         else:
-            mask = None
-        action = []
-        for i, l in enumerate(logit):
-            if np.random.random() > eps:
-                if alpha is None:
-                    action = [sample_action(logit=l) for l in logit]
-                else:
-                    # Note that if alpha is passed in here, we will divide logit by alpha.
-                    action = [sample_action(logit=l / alpha) for l in logit]
-            else:
-                if mask:
-                    action.append(sample_action(prob=mask[i].float()))
-                else:
-                    action.append(torch.randint(0, l.shape[-1], size=l.shape[:-1]))
+            mask = [None] * len(logit)
+        action = [
+            eps_greedy_action(l, eps, m, exploit_action=sample_action(logit=l, alpha=alpha))
+            for l, m in zip(logit, mask)
+        ]
         if len(action) == 1:
             action, logit = action[0], logit[0]
         output['action'] = action
@@ -557,18 +605,10 @@ class HybridEpsGreedySampleWrapper(IModelWrapper):
             mask = output['action_mask']
             if isinstance(mask, torch.Tensor):
                 mask = [mask]
-            logit = [l.sub_(1e8 * (1 - m)) for l, m in zip(logit, mask)]
+            logit = [l.masked_fill_(m == 0, -1e8) for l, m in zip(logit, mask)]
         else:
-            mask = None
-        action = []
-        for i, l in enumerate(logit):
-            if np.random.random() > eps:
-                action.append(l.argmax(dim=-1))
-            else:
-                if mask:
-                    action.append(sample_action(prob=mask[i].float()))
-                else:
-                    action.append(torch.randint(0, l.shape[-1], size=l.shape[:-1]))
+            mask = [None] * len(logit)
+        action = [eps_greedy_action(l, eps, m) for l, m in zip(logit, mask)]
         if len(action) == 1:
             action, logit = action[0], logit[0]
         output = {'action': {'action_type': action, 'action_args': output['action_args']}, 'logit': logit}
@@ -600,18 +640,10 @@ class HybridEpsGreedyMultinomialSampleWrapper(IModelWrapper):
             mask = output['action_mask']
             if isinstance(mask, torch.Tensor):
                 mask = [mask]
-            logit = [l.sub_(1e8 * (1 - m)) for l, m in zip(logit, mask)]
+            logit = [l.masked_fill_(m == 0, -1e8) for l, m in zip(logit, mask)]
         else:
-            mask = None
-        action = []
-        for i, l in enumerate(logit):
-            if np.random.random() > eps:
-                action = [sample_action(logit=l) for l in logit]
-            else:
-                if mask:
-                    action.append(sample_action(prob=mask[i].float()))
-                else:
-                    action.append(torch.randint(0, l.shape[-1], size=l.shape[:-1]))
+            mask = [None] * len(logit)
+        action = [eps_greedy_action(l, eps, m, exploit_action=sample_action(logit=l)) for l, m in zip(logit, mask)]
         if len(action) == 1:
             action, logit = action[0], logit[0]
         output = {'action': {'action_type': action, 'action_args': output['action_args']}, 'logit': logit}
@@ -634,14 +666,10 @@ class HybridReparamMultinomialSampleWrapper(IModelWrapper):
 
         logit = output['logit']  # logit: {'action_type': action_type_logit, 'action_args': action_args_logit}
         # discrete part
-        action_type_logit = logit['action_type']
-        prob = torch.softmax(action_type_logit, dim=-1)
-        pi_action = Categorical(prob)
-        action_type = pi_action.sample()
+        action_type = sample_action(logit=logit['action_type'])
         # continuous part
         mu, sigma = logit['action_args']['mu'], logit['action_args']['sigma']
-        dist = Independent(Normal(mu, sigma), 1)
-        action_args = dist.sample()
+        action_args = sample_normal(mu, sigma)
         action = {'action_type': action_type, 'action_args': action_args}
         output['action'] = action
         return output
@@ -698,8 +726,7 @@ class ReparamSample(IModelWrapper):
         output = self._model.forward(*args, **kwargs)
         assert isinstance(output, dict), "model output must be dict, but find {}".format(type(output))
         mu, sigma = output['logit']['mu'], output['logit']['sigma']
-        dist = Independent(Normal(mu, sigma), 1)
-        output['action'] = dist.sample()
+        output['action'] = sample_normal(mu, sigma)
         return output
 
 
@@ -712,9 +739,22 @@ class EpsGreedySampleNGUWrapper(IModelWrapper):
         register
     """
 
+    def __init__(self, model: Any) -> None:
+        super().__init__(model)
+        # cache the per-env eps schedule, key is (env_num, device)
+        self._eps_cache = {}
+
+    def _get_eps(self, env_num: int, device: torch.device) -> torch.Tensor:
+        eps = self._eps_cache.get((env_num, device))
+        if eps is None:
+            env_id = torch.arange(env_num, dtype=torch.float32, device=device)
+            eps = 0.4 ** (1 + 8 * env_id / max(env_num - 1, 1))
+            self._eps_cache[(env_num, device)] = eps
+        return eps
+
     def forward(self, *args, **kwargs):
         kwargs.pop('eps')
-        eps = {i: 0.4 ** (1 + 8 * i / (args[0]['obs'].shape[0] - 1)) for i in range(args[0]['obs'].shape[0])}
+        env_num = args[0]['obs'].shape[0]
         output = self._model.forward(*args, **kwargs)
         assert isinstance(output, dict), "model output must be dict, but find {}".format(type(output))
         logit = output['logit']
@@ -725,18 +765,14 @@ class EpsGreedySampleNGUWrapper(IModelWrapper):
             mask = output['action_mask']
             if isinstance(mask, torch.Tensor):
                 mask = [mask]
-            logit = [l.sub_(1e8 * (1 - m)) for l, m in zip(logit, mask)]
+            logit = [l.masked_fill_(m == 0, -1e8) for l, m in zip(logit, mask)]
         else:
-            mask = None
+            mask = [None] * len(logit)
         action = []
-        for i, l in enumerate(logit):
-            if np.random.random() > eps[i]:
-                action.append(l.argmax(dim=-1))
-            else:
-                if mask:
-                    action.append(sample_action(prob=mask[i].float()))
-                else:
-                    action.append(torch.randint(0, l.shape[-1], size=l.shape[:-1]))
+        for l, m in zip(logit, mask):
+            # each env has its own eps, broadcast along the other batch dims
+            eps = self._get_eps(env_num, l.device).view(env_num, *([1] * (l.dim() - 2)))
+            action.append(eps_greedy_action(l, eps, m))
         if len(action) == 1:
             action, logit = action[0], logit[0]
         output['action'] = action
@@ -772,6 +808,8 @@ class ActionNoiseWrapper(IModelWrapper):
         self.noise_generator = create_noise_generator(noise_type, noise_kwargs)
         self.noise_range = noise_range
         self.action_range = action_range
+        # persistent buffer filled in place by ``noise_generator``, reallocated only when action's shape changes
+        self._noise_buf = None
 
     def forward(self, *args, **kwargs):
         output = self._model.forward(*args, **kwargs)
@@ -793,12 +831,15 @@ class ActionNoiseWrapper(IModelWrapper):
         Returns:
             - noised_action (:obj:`torch.Tensor`): Action processed after adding noise and clipping.
         """
-        noise = self.noise_generator(action.shape, action.device)
+        if self._noise_buf is None or self._noise_buf.shape != action.shape or \
+                self._noise_buf.device != action.device:
+            self._noise_buf = torch.empty_like(action)
+        noise = self.noise_generator.fill_(self._noise_buf)
         if self.noise_range is not None:
-            noise = noise.clamp(self.noise_range['min'], self.noise_range['max'])
+            noise.clamp_(self.noise_range['min'], self.noise_range['max'])
         action += noise
         if self.action_range is not None:
-            action = action.clamp(self.action_range['min'], self.action_range['max'])
+            action.clamp_(self.action_range['min'], self.action_range['max'])
         return action
 
     def reset(self) -> None:
@@ -823,6 +864,10 @@ class TargetNetworkWrapper(IModelWrapper):
         self._update_type = update_type
         self._update_kwargs = update_kwargs
         self._update_count = 0
+        # Parameter objects persist through ``Module.to`` and ``load_state_dict``, so they can be collected once
+        named_params = list(self._model.named_parameters())
+        self._param_names = [name for name, _ in named_params]
+        self._params = [p for _, p in named_params]
 
     def reset(self, *args, **kwargs):
         target_update_count = kwargs.pop('target_update_count', None)
@@ -846,13 +891,37 @@ class TargetNetworkWrapper(IModelWrapper):
         else:
             if self._update_type == 'assign':
                 if (self._update_count + 1) % self._update_kwargs['freq'] == 0:
-                    self._model.load_state_dict(state_dict, strict=True)
+                    self._assign(state_dict)
                 self._update_count += 1
             elif self._update_type == 'momentum':
+                # default theta = 0.001
                 theta = self._update_kwargs['theta']
-                for name, p in self._model.named_parameters():
-                    # default theta = 0.001
-                    p.data = (1 - theta) * p.data + theta * state_dict[name]
+                params, src = self._params, [state_dict[name] for name in self._param_names]
+                with torch.no_grad():
+                    if hasattr(torch, '_foreach_mul_'):
+                        # blend all the parameters with a few batched (multi-tensor) kernels instead of 2 per parameter
+                        torch._foreach_mul_(params, 1 - theta)
+                        torch._foreach_add_(params, torch._foreach_mul(src, theta))
+                    else:
+                        for p, s in zip(params, src):
+                            p.mul_(1 - theta).add_(theta * s)
+
+    def _assign(self, state_dict: dict) -> None:
+        r"""
+        Overview:
+            Copy ``state_dict`` into the target network in place, skipping the key validation and hook dispatch \
+            of ``load_state_dict``. Parameters are copied into the cached Parameter objects, which persist through \
+            ``Module.to``; buffers are replaced by ``Module.to``, so they are fetched again on every call.
+        Arguments:
+            - state_dict (:obj:`dict`): the state_dict from learner model
+        """
+        with torch.no_grad():
+            for name, p in zip(self._param_names, self._params):
+                p.copy_(state_dict[name])
+            for name, b in self._model.named_buffers():
+                # non-persistent buffers are not in state_dict
+                if name in state_dict:
+                    b.copy_(state_dict[name])
 
     def reset_state(self, target_update_count: int = None) -> None:
         r"""
@@ -904,14 +973,17 @@ wrapper_name_map = {
 }
 
 
-def model_wrap(model, wrapper_name: str = None, **kwargs):
-    if wrapper_name in wrapper_name_map:
-        if not isinstance(model, IModelWrapper):
-            model = wrapper_name_map['base'](model)
-        model = wrapper_name_map[wrapper_name](model, **kwargs)
+def model_wrap(model, wrapper_name: Union[str, type] = None, **kwargs):
+    # a wrapper class can also be passed directly instead of its registered name
+    if isinstance(wrapper_name, type) and issubclass(wrapper_name, IModelWrapper):
+        wrapper_cls = wrapper_name
     else:
+        wrapper_cls = wrapper_name_map.get(wrapper_name)
+    if wrapper_cls is None:
         raise TypeError("not support model_wrapper type: {}".format(wrapper_name))
-    return model
+    if not isinstance(model, IModelWrapper):
+        model = wrapper_name_map['base'](model)
+    return wrapper_cls(model, **kwargs)
 
 
 def register_wrapper(name: str, wrapper_type: type):
@@ -10,6 +10,7 @@ import logging
 from ding.torch_utils import get_lstm
 from ding.torch_utils.network.gtrxl import GTrXL
 from ding.model import model_wrap, register_wrapper, IModelWrapper, BaseModelWrapper
+from ding.model.wrapper.model_wrappers import eps_greedy_action, ArgmaxSampleWrapper
 
 
 class TempMLP(torch.nn.Module):
@@ -278,7 +279,8 @@ class TestModelWrappers:
         target_model2.update(model.state_dict(), direct=True)
         assert model.fc1.weight.eq(target_model2.fc1.weight).sum() == 12
         model.fc1.weight.data = torch.randn_like(model.fc1.weight)
-        old_state_dict = target_model2.state_dict()
+        # the momentum update is in place, so state_dict() (which shares storage) must be copied to keep old values
+        old_state_dict = {k: v.clone() for k, v in target_model2.state_dict().items()}
         target_model2.update(model.state_dict())
         assert target_model2.fc1.weight.data.eq(
             old_state_dict['fc1.weight'] * (1 - 0.01) + model.fc1.weight.data * 0.01
@@ -301,6 +303,17 @@ class TestModelWrappers:
             assert isinstance(output, dict)
         assert output['tmp'] == 1
 
+    def test_eps_greedy_action(self):
+        logit = torch.randn(4, 6)
+        assert eps_greedy_action(logit, 0.).eq(logit.argmax(dim=-1)).all()
+        mask = torch.zeros(4, 6)
+        mask[:, 2] = 1
+        assert eps_greedy_action(logit, 1., mask).eq(2).all()
+        action = eps_greedy_action(logit, torch.tensor([0., 0., 1., 1.]), mask)
+        assert action[:2].eq(logit[:2].argmax(dim=-1)).all() and action[2:].eq(2).all()
+        exploit_action = torch.LongTensor([5, 4, 3, 1])
+        assert eps_greedy_action(logit, 0., exploit_action=exploit_action).eq(exploit_action).all()
+
     def test_multinomial_sample_wrapper(self):
         model = model_wrap(ActorMLP(), wrapper_name='multinomial_sample')
         data = {'obs': torch.randn(4, 3)}
@@ -398,6 +411,10 @@ class TestModelWrappers:
         output = model.forward(data)
         logit = output['logit'].sub(1e8 * (1 - data['mask']))
         assert output['action'].eq(logit.argmax(dim=-1)).all()
+        model = model_wrap(ActorMLP(), wrapper_name=ArgmaxSampleWrapper)
+        assert isinstance(model, ArgmaxSampleWrapper)
+        output = model.forward({'obs': torch.randn(4, 3)})
+        assert output['action'].eq(output['logit'].argmax(dim=-1)).all()
 
     def test_hybrid_argmax_sample_wrapper(self):
         model = model_wrap(HybridActorMLP(), wrapper_name='hybrid_argmax_sample')
@@ -481,6 +498,12 @@ class TestModelWrappers:
         action = output['action']
         assert action.shape == (4, 6)
         assert action.eq(action.clamp(-0.05, 0.05)).all()
+        # the noise buffer is reused as long as the action shape doesn't change
+        noise_buf = model._noise_buf
+        model.forward(data)
+        assert model._noise_buf is noise_buf
+        model.forward({'obs': torch.randn(2, 3)})
+        assert model._noise_buf is not noise_buf and model._noise_buf.shape == (2, 6)
 
     def test_transformer_input_wrapper(self):
         seq_len, bs, obs_shape = 8, 8, 32
@@ -24,6 +24,11 @@ def test_noise():
     g_noise = gauss(logits.shape, logits.device)
     assert g_noise.shape == logits.shape
     assert g_noise.device == logits.device
+    buf = torch.empty(bs, dim)
+    assert gauss.fill_(buf) is buf
+    # sigma=0 (e.g. collect noise_sigma=0 in td3_vae configs) gives constant mu noise
+    gauss = create_noise_generator(noise_type='gauss', noise_kwargs={'mu': 0.5, 'sigma': 0.})
+    assert gauss.fill_(buf).eq(0.5).all()
 
     x0 = torch.rand(bs, dim)
     ou = create_noise_generator(noise_type='ou', noise_kwargs={'mu': 0.1, 'sigma': 1.0, 'theta': 2.0, 'x0': x0})
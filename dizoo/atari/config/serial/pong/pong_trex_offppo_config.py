@@ -10,7 +10,7 @@ pong_trex_ppo_config = dict(
         stop_value=20,
         env_id='PongNoFrameskip-v4',
         frame_stack=4,
-        manager=dict(shared_memory=False, )
+        manager=dict(shared_memory=True, reset_inplace=True)
     ),
     reward_model=dict(
         type='trex',
@@ -72,8 +72,7 @@ pong_trex_ppo_create_config = dict(
         type='atari',
         import_names=['dizoo.atari.envs.atari_env'],
     ),
-    # env_manager=dict(type='subprocess'),
-    env_manager=dict(type='base'),
+    env_manager=dict(type='subprocess'),
     policy=dict(type='ppo_offpolicy'),
 )
 pong_trex_ppo_create_config = EasyDict(pong_trex_ppo_create_config)
@@ -3,6 +3,7 @@ from easydict import EasyDict
 walker2d_ddpg_gail_default_config = dict(
     exp_name='walker2d_ddpg_gail',
     env=dict(
+        manager=dict(shared_memory=True, reset_inplace=True),
         env_id='Walker2d-v3',
         norm_obs=dict(use_norm=False, ),
         norm_reward=dict(use_norm=False, ),
@@ -64,7 +65,7 @@ walker2d_ddpg_gail_default_create_config = dict(
         type='mujoco',
         import_names=['dizoo.mujoco.envs.mujoco_env'],
     ),
-    env_manager=dict(type='base'),
+    env_manager=dict(type='subprocess'),
     policy=dict(
         type='ddpg',
         import_names=['ding.policy.ddpg'],